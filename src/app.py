@@ -1,3 +1,5 @@
+import gc
+import os
 import dash
 import dash_html_components as html
 import dash_core_components as dcc
@@ -5,7 +7,10 @@ from dash.dependencies import Input, Output
 import pandas as pd
 import plotly.graph_objects as go
 from utils.tickers import Ticker, load_tickers
-from utils.load import load_index
+from utils.load import load_index, load_hourly_index, load_comention_index
+from utils.comentions import top_comentions
+from utils.memory import DateOffsets, baseline_bytes, compact_index, memory_report
+from utils.pyramid import GRANULARITIES, build_pyramid, truncate_date
 import typing as t
 from utils.filters import StockSelection, TimeSelection
 
@@ -20,7 +25,47 @@ tickers = load_tickers(
     "../data/NASDAQ_stock_tickers.csv",
 )
 keyed_tickers = {x.symbol: x for x in tickers}
-index = load_index("../data/compiled_index_min10_keepcase.csv")
+# indexes store symbols as codes into the ticker table so every symbol string is only held once
+symbol_dtype = pd.CategoricalDtype(list(keyed_tickers))
+
+# prefer the hourly index when it has been compiled, otherwise the finest level available is a day
+hourly_index_path = "../data/compiled_index_min10_keepcase_hourly.npz"
+if os.path.exists(hourly_index_path):
+    loaded = build_pyramid(load_hourly_index(hourly_index_path), granularity="hour")
+else:
+    loaded = build_pyramid(load_index("../data/compiled_index_min10_keepcase.csv"), granularity="day")
+# co-mentions are only shown when they have been compiled
+comention_index_path = "../data/compiled_comentions_min10_keepcase.npz"
+comention_granularity = None
+if os.path.exists(comention_index_path):
+    loaded["comentions"], comention_granularity = load_comention_index(comention_index_path)
+
+# dates are stored as hours or days since the first day in the index
+start_date = loaded["day"].date.min().floor("D")
+date_offsets = {
+    "hour": DateOffsets(start_date, "h"),
+    "day": DateOffsets(start_date, "D"),
+    "week": DateOffsets(start_date, "D"),
+    "comentions": DateOffsets(start_date, "D"),
+}
+# measure the original layout before compacting so the savings can be reported
+baseline = {x: baseline_bytes(df) for x, df in loaded.items()}
+compacted = {x: compact_index(loaded[x], symbol_dtype, date_offsets[x]) for x in GRANULARITIES if x in loaded}
+if "comentions" in loaded:
+    compacted["comentions"] = compact_index(
+        loaded["comentions"],
+        symbol_dtype,
+        date_offsets["comentions"],
+        symbol_columns=("symbol_a", "symbol_b"),
+    )
+del loaded
+gc.collect()
+# report memory used by the indexes once the uncompacted frames are freed so savings can be checked for each worker
+print(memory_report(baseline, compacted))
+
+pyramid = {x: compacted[x] for x in GRANULARITIES if x in compacted}
+comentions = compacted.get("comentions")
+index = pyramid["day"]
 
 
 # =======
@@ -46,12 +91,13 @@ def apply_ticker_filter(results: pd.DataFrame, stock: StockSelection, sector: st
 
 
 # filter results dataframe to specific date range based on current user selection
-def apply_time_filter(results: pd.DataFrame, time_selection: str):
+def apply_time_filter(results: pd.DataFrame, time_selection: str, offsets: DateOffsets, granularity: str = "day"):
     # parse selection value
     selection = TimeSelection.from_value(time_selection)
-    # filter to minimum date based on user selection
+    # filter to minimum date based on user selection, keeping the bucket the minimum date falls in
     if selection.min_date is not None:
-        results = results[results.date >= pd.to_datetime(selection.min_date)]
+        min_date = truncate_date(selection.min_date, granularity)
+        results = results[results.date >= offsets.encode_one(min_date)]
     return results
 
 
@@ -116,6 +162,17 @@ def make_time_dropdown():
     )
 
 
+# create the granularity selection dropdown based on the levels available in the index
+def make_granularity_dropdown():
+    return dcc.Dropdown(
+        id="granularity_selection",
+        options=[dict(label=x, value=x) for x in GRANULARITIES if x in pyramid],
+        value="day",
+        placeholder="Select granularity",
+        clearable=False,
+    )
+
+
 # create the industry selection dropdown based on the tickers loaded
 def make_category_dropdown():
     # make base option
@@ -174,6 +231,8 @@ app.layout = html.Div([
         make_stock_dropdown(),
         html.Span(className="control-word", children="for"),
         make_time_dropdown(),
+        html.Span(className="control-word", children="by"),
+        make_granularity_dropdown(),
         html.Div(id="category_container", children=[
             html.Span(className="control-word", children="in"),
             make_category_dropdown(),
@@ -207,6 +266,11 @@ app.layout = html.Div([
         dcc.Graph(id="trend_graph"),
         make_section_heading("Relative Stock Symbol Frequency", info="See how stocks compare to others mentioned on the same day"),
         dcc.Graph(id="relative_trend_graph"),
+        # co-mentions only show when they have been compiled
+        *([
+            make_section_heading("Mentioned Together", info="Find the stocks most often mentioned in the same message"),
+            dcc.Graph(id="comention_graph"),
+        ] if comentions is not None else []),
 
 
         # links
@@ -254,27 +318,53 @@ def handle_category_visiblity(selected_stock):
         return dict(display="none")
 
 
+# create the figure of stocks mentioned together with the selected stocks
+def make_comention_figure(selected_time, result_tickers: t.List[Ticker]):
+    comention_fig = go.Figure()
+    comention_fig.update_layout(
+        xaxis_title="Messages Mentioning Both",
+        yaxis_title="Stocks",
+        margin=dict(t=0),
+    )
+    # find the pairs of stocks mentioned together most in the selected time range
+    pairs = top_comentions(
+        apply_time_filter(comentions, selected_time, date_offsets["comentions"], comention_granularity),
+        (x.symbol for x in result_tickers),
+    )
+    # show most common pair at the top
+    pairs = pairs[::-1]
+    comention_fig.add_trace(go.Bar(
+        y=[f"{a} & {b}" for a, b in zip(pairs.symbol_a, pairs.symbol_b)],
+        x=pairs.occurrences,
+        orientation="h",
+    ))
+    return comention_fig
+
+
 # control primary function of app by reading current user selections and controlling figures
 @app.callback(
     Output(component_id="trend_graph", component_property="figure"),
     Output(component_id="relative_trend_graph", component_property="figure"),
     Output(component_id="ranking_graph", component_property="figure"),
     Output(component_id="links_container", component_property="children"),
+    # co-mentions only update when they have been compiled
+    *([Output(component_id="comention_graph", component_property="figure")] if comentions is not None else []),
     Input(component_id="stock_selection", component_property="value"),
     Input(component_id="time_selection", component_property="value"),
     Input(component_id="category_selection", component_property="value"),
+    Input(component_id="granularity_selection", component_property="value"),
 )
-def handle_visible_data(selected_stock, selected_time, selected_category):
+def handle_visible_data(selected_stock, selected_time, selected_category, selected_granularity):
     # parse user stock selection
     stock = StockSelection.from_value(selected_stock)
 
-    # reduce data to only selected stocks and time range
-    results = index
+    # reduce data to only selected stocks and time range at the selected granularity
+    results = pyramid[selected_granularity]
     results = apply_ticker_filter(results, stock, selected_category)
-    results = apply_time_filter(results, selected_time)
+    results = apply_time_filter(results, selected_time, date_offsets[selected_granularity], selected_granularity)
 
     # calculate total occurrences of resulting stock
-    totals = results.groupby(results.symbol).occurrences.sum().sort_values(ascending=True)
+    totals = results.groupby(results.symbol, observed=True).occurrences.sum().sort_values(ascending=True)
     # reduce to desired amount if necessary
     if stock.is_top_n():
         totals = totals[-stock.top:]
@@ -312,9 +402,14 @@ def handle_visible_data(selected_stock, selected_time, selected_category):
         # filter to only this ticker
         trend = results[results.symbol == ticker.symbol]
         # reduce to a single series of occurrences indexed by date
-        trend = trend.set_index(trend.date).occurrences
+        offsets = date_offsets[selected_granularity]
+        trend = trend.set_index(offsets.decode(trend.date)).occurrences
         # reindex the series so missing dates are filled with 0
-        filled_dates = pd.date_range(results.date.min(), results.date.max(), freq="D")
+        filled_dates = pd.date_range(
+            offsets.decode(results.date.min()),
+            offsets.decode(results.date.max()),
+            freq=GRANULARITIES[selected_granularity],
+        )
         trend = trend.reindex(filled_dates, fill_value=0)
         # make line component and add to absolute graph
         trend_fig.add_trace(go.Scatter(
@@ -351,6 +446,8 @@ def handle_visible_data(selected_stock, selected_time, selected_category):
     # make link cells
     link_cells = [make_stock_link_cell(i + 1, x) for i, x in enumerate(result_tickers[::-1])]
 
+    if comentions is not None:
+        return trend_fig, rel_trend_fig, rank_fig, link_cells, make_comention_figure(selected_time, result_tickers)
     return trend_fig, rel_trend_fig, rank_fig, link_cells
 
 
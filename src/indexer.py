@@ -1,13 +1,65 @@
+import inspect
 import typing as t
+import numpy as np
 import pandas as pd
+from utils.cache import ArtifactCache, file_hash
+from utils.comentions import build_comentions
 from utils.load import load_messages
+from utils.pyramid import delta_encode
 from utils.tickers import Ticker, load_tickers
 
 
+# pandas 1.5 renamed the line_terminator argument of to_csv, and 2.0 removed the old name
+LINE_TERMINATOR = "lineterminator" if "lineterminator" in inspect.signature(pd.DataFrame.to_csv).parameters \
+    else "line_terminator"
+
+
+# count occurrences of a symbol in each message that mentions it
+def count_occurrences(df: pd.DataFrame, symbol: str) -> pd.Series:
+    # find number of occurrences in messages
+    occurrences = df.body.str.count(f" {symbol} ").rename("occurrences")
+    # exclude days where no reference to this stock
+    return occurrences[occurrences > 0]
+
+
 # run indexing process to count occurrences of every stock in all messages
-def create_index(path: str, messages_path: str, ts: t.List[Ticker], minimum_occurrences: int = 10):
-    # load all messages from reddit dataset
-    df = load_messages(messages_path)
+def create_index(
+    path: str,
+    messages_path: str,
+    ts: t.List[Ticker],
+    minimum_occurrences: int = 10,
+    hourly_path: str = None,
+    cache_dir: str = None,
+    comention_path: str = None,
+    comention_granularity: str = "day",
+):
+    keep_hour = hourly_path is not None
+    cache = ArtifactCache(cache_dir) if cache_dir is not None else None
+    source_hash = file_hash(messages_path) if cache is not None else None
+
+    # load all messages from reddit dataset, reusing the cleaned messages from a previous run when possible
+    df = None
+    if cache is not None:
+        messages_key = cache.key(source_hash, keep_hour)
+        df = cache.load("messages", messages_key)
+    if df is None:
+        df = load_messages(messages_path, keep_hour=keep_hour)
+        if cache is not None:
+            cache.save("messages", messages_key, df)
+
+    # unthresholded occurrences of each symbol by message, which only depend on the messages themselves
+    counts: t.Dict[str, pd.Series] = {}
+    if cache is not None:
+        counts_key = cache.key(source_hash)
+        counts = cache.load("counts", counts_key) or {}
+    counts_changed = False
+
+    # symbols included in the index, whose position is used as their id in the compact indexes
+    indexed_symbols: t.List[str] = []
+    # hourly counts of each indexed symbol, only collected when an hourly index is requested
+    hourly_parts: t.List[pd.DataFrame] = []
+    # messages mentioning each indexed symbol, only collected when a co-mention index is requested
+    mention_parts: t.List[pd.DataFrame] = []
 
     # access file to output compiled index of symbol occurrences
     with open(path, "w") as i_file:
@@ -16,10 +68,11 @@ def create_index(path: str, messages_path: str, ts: t.List[Ticker], minimum_occu
 
         # index each ticker
         for i, ticker in enumerate(ts):
-            # find number of occurrences in messages
-            occurrences = df.body.str.count(f" {ticker.symbol} ").rename("occurrences")
-            # exclude days where no reference to this stock
-            occurrences = occurrences[occurrences > 0]
+            occurrences = counts.get(ticker.symbol)
+            if occurrences is None:
+                occurrences = count_occurrences(df, ticker.symbol)
+                counts[ticker.symbol] = occurrences
+                counts_changed = True
             # count total
             total = occurrences.sum()
             # only include tickers mentioned a minimum amount
@@ -44,10 +97,91 @@ def create_index(path: str, messages_path: str, ts: t.List[Ticker], minimum_occu
                 columns=["symbol", "date", "occurrences"],
                 index=False,
                 header=False,
-                line_terminator="\n"
+                **{LINE_TERMINATOR: "\n"},
             )
             i_file.flush()
 
+            # aggregate count by hour if keeping the hourly index
+            if hourly_path is not None:
+                hourly = occurrences.groupby(df.hour[occurrences.index]).sum()
+                hourly_parts.append(pd.DataFrame({
+                    "symbol_id": len(indexed_symbols),
+                    "hour": hourly.index.values.astype("datetime64[h]").astype(np.int64),
+                    "occurrences": hourly.values,
+                }))
+
+            # keep which messages mention this symbol if indexing co-mentions
+            if comention_path is not None:
+                mention_parts.append(pd.DataFrame({
+                    "message": occurrences.index,
+                    "symbol_id": len(indexed_symbols),
+                    "date": df.date[occurrences.index].values,
+                }))
+
+            indexed_symbols.append(ticker.symbol)
+
+    # only rewrite the counts when new symbols were counted
+    if cache is not None and counts_changed:
+        cache.save("counts", counts_key, counts)
+
+    if hourly_path is not None:
+        write_hourly_index(hourly_path, indexed_symbols, hourly_parts)
+
+    if comention_path is not None:
+        write_comention_index(comention_path, indexed_symbols, mention_parts, comention_granularity)
+
+
+# write the hourly counts as a compact sparse array of (symbol_id, hour_offset, count) rows
+def write_hourly_index(path: str, symbols: t.List[str], parts: t.List[pd.DataFrame]):
+    # no symbols may reach the minimum occurrences, which still writes an empty index
+    if len(parts) == 0:
+        rows = np.zeros((0, 3), dtype=np.int32)
+        np.savez_compressed(path, symbols=np.array(symbols, dtype=str), start=np.int64(0), index=rows)
+        return
+    # rows are ordered by symbol then hour so the deltas are mostly small and positive
+    hourly = pd.concat(parts, ignore_index=True).sort_values(["symbol_id", "hour"])
+    # store hours relative to the first hour in the index
+    start = hourly.hour.min()
+    rows = np.column_stack([
+        hourly.symbol_id.values,
+        delta_encode(hourly.hour.values - start),
+        hourly.occurrences.values,
+    ]).astype(np.int32)
+    np.savez_compressed(path, symbols=np.array(symbols, dtype=str), start=np.int64(start), index=rows)
+
+
+# write the co-mention counts as a compact coordinate list of (day_offset, symbol_a, symbol_b, count) rows
+# along with the granularity, since weekly buckets are stored as the day each week starts
+def write_comention_index(path: str, symbols: t.List[str], parts: t.List[pd.DataFrame], granularity: str = "day"):
+    # no symbols may reach the minimum occurrences, which still writes an empty index
+    if len(parts) == 0:
+        rows = np.zeros((0, 4), dtype=np.int32)
+        np.savez_compressed(
+            path,
+            symbols=np.array(symbols, dtype=str),
+            start=np.int64(0),
+            granularity=np.array(granularity),
+            index=rows,
+        )
+        return
+    comentions = build_comentions(pd.concat(parts, ignore_index=True), granularity)
+    days = comentions.date.values.astype("datetime64[D]").astype(np.int64)
+    # store days relative to the first day in the index, rows are already ordered by day
+    start = days.min() if len(days) > 0 else 0
+    rows = np.column_stack([
+        delta_encode(days - start),
+        comentions.symbol_id_a.values,
+        comentions.symbol_id_b.values,
+        comentions.occurrences.values,
+    ]).astype(np.int32)
+    np.savez_compressed(
+        path,
+        symbols=np.array(symbols, dtype=str),
+        start=np.int64(start),
+        granularity=np.array(granularity),
+        index=rows,
+    )
+
 
 if __name__ == "__main__":
     # pre-calculate indexes so refined data is available for higher performance
@@ -55,4 +189,12 @@ if __name__ == "__main__":
         "../data/NYSE_stock_tickers.csv",
         "../data/NASDAQ_stock_tickers.csv",
     )
-    create_index("../data/compiled_index_min10_keepcase.csv", "../data/reddit_wsb.csv", tickers, minimum_occurrences=10)
+    create_index(
+        "../data/compiled_index_min10_keepcase.csv",
+        "../data/reddit_wsb.csv",
+        tickers,
+        minimum_occurrences=10,
+        hourly_path="../data/compiled_index_min10_keepcase_hourly.npz",
+        cache_dir="../data/cache",
+        comention_path="../data/compiled_comentions_min10_keepcase.npz",
+    )
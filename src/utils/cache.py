@@ -0,0 +1,58 @@
+import os
+import pickle
+import hashlib
+import typing as t
+
+
+# bump this whenever cleaning or counting changes so old artifacts are no longer used
+CACHE_VERSION = 1
+
+
+# hash the contents of a file so artifacts are invalidated when the source data changes
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# class to store intermediate results of the indexer between runs
+class ArtifactCache:
+    # store all artifacts as files inside a single directory
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    # build a key from everything an artifact depends on
+    @staticmethod
+    def key(*parts: t.Any) -> str:
+        digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for p in parts:
+            digest.update(b"\0" + repr(p).encode())
+        return digest.hexdigest()[:16]
+
+    # location of an artifact on disk
+    def path(self, name: str, key: str) -> str:
+        return os.path.join(self.directory, f"{name}-{key}.pkl")
+
+    # load an artifact, or None if it hasn't been stored yet or can't be read
+    def load(self, name: str, key: str) -> t.Any:
+        path = self.path(name, key)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # damaged files or pickles from other library versions are recomputed instead
+            print(f"Ignoring unreadable artifact {path}: {e!r}")
+            return None
+
+    # store an artifact, replacing any previous version with the same key
+    def save(self, name: str, key: str, artifact: t.Any):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name, key)
+        # write to a temporary file first so an interrupted run can't leave a partial artifact
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,26 @@
+import typing as t
+import pandas as pd
+from utils.pyramid import truncate_dates
+
+
+# count how many messages mention each pair of symbols together in each time bucket
+def build_comentions(mentions: pd.DataFrame, granularity: str = "day") -> pd.DataFrame:
+    # mentions has one row per (message, symbol_id, date) so pair up the symbols in the same message
+    pairs = mentions.merge(mentions[["message", "symbol_id"]], on="message", suffixes=("_a", "_b"))
+    # only keep each pair once, and never pair a symbol with itself
+    pairs = pairs[pairs.symbol_id_a < pairs.symbol_id_b]
+    pairs = pairs.assign(date=truncate_dates(pd.to_datetime(pairs.date), granularity))
+    comentions = pairs.groupby(["date", "symbol_id_a", "symbol_id_b"]).size().rename("occurrences").reset_index()
+    return comentions
+
+
+# find the symbols mentioned most often alongside any of the given symbols
+def top_comentions(comentions: pd.DataFrame, symbols: t.Iterable[str], n: int = 10) -> pd.DataFrame:
+    symbols = list(symbols)
+    results = comentions
+    # filter to pairs including at least one of the symbols
+    results = results[results.symbol_a.isin(symbols) | results.symbol_b.isin(symbols)]
+    # aggregate count by pair and keep the most common
+    totals = results.groupby(["symbol_a", "symbol_b"], observed=True).occurrences.sum()
+    totals = totals[totals > 0].sort_values(ascending=False, kind="stable")[:n]
+    return totals.reset_index()
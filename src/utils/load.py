@@ -1,14 +1,20 @@
+import typing as t
+import numpy as np
 import pandas as pd
+from utils.pyramid import delta_decode
 
 
 # load and cleanup all messages from the reddit dataset
-def load_messages(path: str) -> pd.DataFrame:
+def load_messages(path: str, keep_hour: bool = False) -> pd.DataFrame:
     # read only necessary columns from dataset
     df = pd.read_csv(path, parse_dates=["timestamp"], usecols=["body", "timestamp"])
     # filter to only rows with non-null body
     df = df[~df.body.isnull()]
     # remap the timestamps to only the date
     df["date"] = df.timestamp.dt.date
+    # optionally keep the hour of each message for the hourly index
+    if keep_hour:
+        df["hour"] = df.timestamp.values.astype("datetime64[h]")
     # remove old timestamp column
     df.drop(columns=["timestamp"], inplace=True)
     # clean body of all messages to only letters and whitespace
@@ -27,3 +33,37 @@ def load_index(path: str) -> pd.DataFrame:
         parse_dates=["date"],
     )
     return df
+
+
+# load pre-calculated hourly index stored as delta encoded (symbol_id, hour_offset, count) rows
+def load_hourly_index(path: str) -> pd.DataFrame:
+    with np.load(path) as data:
+        symbols = data["symbols"]
+        rows = data["index"]
+        start = data["start"]
+    # hours are stored as deltas from the previous row, starting at the first hour in the index
+    hours = np.datetime64(int(start), "h") + delta_decode(rows[:, 1])
+    df = pd.DataFrame({
+        "symbol": pd.Categorical.from_codes(rows[:, 0], categories=symbols),
+        "date": hours.astype("datetime64[ns]"),
+        "occurrences": rows[:, 2],
+    })
+    return df
+
+
+# load pre-calculated co-mention index stored as delta encoded (day_offset, symbol_a, symbol_b, count) rows
+def load_comention_index(path: str) -> t.Tuple[pd.DataFrame, str]:
+    with np.load(path) as data:
+        symbols = data["symbols"]
+        rows = data["index"]
+        start = data["start"]
+        # days are the start of each bucket, which may be a day or a week
+        granularity = str(data["granularity"]) if "granularity" in data else "day"
+    days = np.datetime64(int(start), "D") + delta_decode(rows[:, 0])
+    df = pd.DataFrame({
+        "date": days.astype("datetime64[ns]"),
+        "symbol_a": pd.Categorical.from_codes(rows[:, 1], categories=symbols),
+        "symbol_b": pd.Categorical.from_codes(rows[:, 2], categories=symbols),
+        "occurrences": rows[:, 3],
+    })
+    return df, granularity
@@ -0,0 +1,95 @@
+import os
+import typing as t
+import numpy as np
+import pandas as pd
+
+
+# class to store dates as small integer offsets from a start date
+class DateOffsets:
+    # offsets count whole units ("h" or "D") since the start date
+    def __init__(self, start: pd.Timestamp, unit: str):
+        self.start = pd.Timestamp(start)
+        self.unit = unit
+
+    # convert dates to offsets, stored in the smallest integer type that fits
+    def encode(self, dates: pd.Series) -> pd.Series:
+        offsets = (dates - self.start) // pd.Timedelta(1, unit=self.unit)
+        return pd.to_numeric(offsets, downcast="integer")
+
+    # convert a single date to an offset so it can be compared against an encoded column
+    def encode_one(self, date) -> int:
+        return (pd.Timestamp(date) - self.start) // pd.Timedelta(1, unit=self.unit)
+
+    # convert offsets back to dates
+    def decode(self, offsets):
+        if np.ndim(offsets) == 0:
+            return self.start + pd.to_timedelta(int(offsets), unit=self.unit)
+        return self.start + pd.to_timedelta(np.asarray(offsets, dtype=np.int64), unit=self.unit)
+
+
+# reduce an index to categorical symbols, integer date offsets and the smallest count type that fits
+def compact_index(
+    df: pd.DataFrame,
+    symbol_dtype: pd.CategoricalDtype,
+    offsets: DateOffsets,
+    symbol_columns: t.Sequence[str] = ("symbol",),
+) -> pd.DataFrame:
+    # symbols missing from the ticker table can't be shown, so don't keep them
+    known = np.logical_and.reduce([df[c].isin(symbol_dtype.categories).values for c in symbol_columns])
+    df = df[known]
+    compact = pd.DataFrame({c: df[c].astype(symbol_dtype).values for c in symbol_columns})
+    compact["date"] = offsets.encode(df.date).values
+    compact["occurrences"] = pd.to_numeric(df.occurrences, downcast="unsigned").values
+    return compact
+
+
+# bytes used by an index, not counting categories since those are shared with the ticker table
+def index_bytes(df: pd.DataFrame) -> int:
+    total = df.index.memory_usage(deep=True)
+    for c in df.columns:
+        if isinstance(df[c].dtype, pd.CategoricalDtype):
+            total += df[c].cat.codes.nbytes
+        else:
+            total += df[c].memory_usage(deep=True, index=False)
+    return total
+
+
+# bytes an index would use in the original layout of object symbols, datetime64 dates and int64 counts
+def baseline_bytes(df: pd.DataFrame) -> int:
+    total = df.index.memory_usage(deep=True)
+    for c in df.columns:
+        if df[c].dtype.kind in "iuM":
+            total += len(df) * 8
+        else:
+            total += df[c].astype(object).memory_usage(deep=True, index=False)
+    return total
+
+
+# resident memory of this process right now, or None where it can't be read
+def current_rss() -> t.Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# describe how much memory each index uses compared with the original layout
+def memory_report(before: t.Dict[str, int], after: t.Dict[str, pd.DataFrame]) -> str:
+    lines = ["index memory usage (original layout of object symbols, datetime64 dates and int64 counts -> compact):"]
+    for name in after:
+        old = before[name]
+        new = index_bytes(after[name])
+        lines.append(
+            f"  {name}: {len(after[name]):,} rows, {old / 1e6:.2f} MB -> {new / 1e6:.2f} MB ({new / old:.0%})"
+        )
+    # every compacted index points to the same categories, so they are only counted once
+    shared = {
+        id(df[c].cat.categories): df[c].cat.categories.memory_usage(deep=True)
+        for df in after.values() for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)
+    }
+    lines.append(f"  shared symbols: {sum(shared.values()) / 1e6:.2f} MB")
+    rss = current_rss()
+    if rss is not None:
+        lines.append(f"  current process memory: {rss / 1e6:.1f} MB")
+    return "\n".join(lines)
@@ -0,0 +1,58 @@
+import typing as t
+import numpy as np
+import pandas as pd
+
+
+# supported time buckets mapped to the pandas frequency used to fill in missing buckets
+GRANULARITIES = {
+    "hour": "h",
+    "day": "D",
+    "week": "W-MON",
+}
+
+
+# delta encode sorted offsets so the stored integers stay small and compress well
+def delta_encode(offsets: np.ndarray) -> np.ndarray:
+    return np.diff(offsets, prepend=0).astype(np.int32)
+
+
+# reverse the delta encoding back into absolute offsets
+def delta_decode(deltas: np.ndarray) -> np.ndarray:
+    return np.cumsum(deltas, dtype=np.int64)
+
+
+# truncate a column of timestamps to the start of their bucket for a given granularity
+def truncate_dates(dates: pd.Series, granularity: str) -> pd.Series:
+    if granularity == "hour":
+        return dates.dt.floor("h")
+    elif granularity == "day":
+        return dates.dt.floor("D")
+    elif granularity == "week":
+        # weeks start on monday
+        days = dates.dt.floor("D")
+        return days - pd.to_timedelta(days.dt.weekday, unit="D")
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+# truncate a single date to the start of its bucket, so a range starting partway through a bucket still includes it
+def truncate_date(date, granularity: str) -> pd.Timestamp:
+    return truncate_dates(pd.Series([pd.Timestamp(date)]), granularity)[0]
+
+
+# aggregate an index to a coarser granularity
+def rollup(df: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    rolled = df.assign(date=truncate_dates(df.date, granularity))
+    rolled = rolled.groupby(["symbol", "date"], observed=True, sort=True).occurrences.sum().reset_index()
+    return rolled
+
+
+# pre-calculate every coarser level of an index so the app never aggregates the full index in a callback
+def build_pyramid(base: pd.DataFrame, granularity: str = "day") -> t.Dict[str, pd.DataFrame]:
+    names = list(GRANULARITIES)
+    if granularity not in names:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    pyramid = {granularity: base}
+    # each level is rolled up from the previous, already smaller level
+    for finer, coarser in zip(names[names.index(granularity):], names[names.index(granularity) + 1:]):
+        pyramid[coarser] = rollup(pyramid[finer], coarser)
+    return pyramid
@@ -0,0 +1,54 @@
+from utils.cache import ArtifactCache, file_hash
+
+
+def test_file_hash(tmp_path):
+    a = tmp_path / "a.csv"
+    b = tmp_path / "b.csv"
+    a.write_text("body,timestamp\nGME,2021-01-27\n")
+    b.write_text("body,timestamp\nGME,2021-01-27\n")
+
+    # same contents hash the same regardless of path
+    assert file_hash(str(a)) == file_hash(str(b))
+
+    # changed contents hash differently
+    b.write_text("body,timestamp\nAMC,2021-01-27\n")
+    assert file_hash(str(a)) != file_hash(str(b))
+
+
+def test_artifact_cache(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+
+    # keys depend on every part
+    assert ArtifactCache.key("abc", True) == ArtifactCache.key("abc", True)
+    assert ArtifactCache.key("abc", True) != ArtifactCache.key("abc", False)
+    assert ArtifactCache.key("abc") != ArtifactCache.key("abc", None)
+
+    # missing artifacts load as None
+    key = ArtifactCache.key("abc")
+    assert cache.load("counts", key) is None
+
+    # stored artifacts round trip
+    cache.save("counts", key, {"GME": [1, 2, 3]})
+    assert cache.load("counts", key) == {"GME": [1, 2, 3]}
+    assert cache.load("counts", ArtifactCache.key("xyz")) is None
+    assert cache.load("messages", key) is None
+
+    # saving again replaces the artifact
+    cache.save("counts", key, {"AMC": [4]})
+    assert cache.load("counts", key) == {"AMC": [4]}
+
+
+def test_artifact_cache_unreadable(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    key = ArtifactCache.key("abc")
+
+    # damaged artifacts load as None so they are recomputed
+    with open(cache.path("counts", key), "wb") as f:
+        f.write(b"not a pickle")
+    assert cache.load("counts", key) is None
+
+    # truncated artifacts load as None
+    cache.save("counts", key, {"GME": list(range(100))})
+    with open(cache.path("counts", key), "r+b") as f:
+        f.truncate(10)
+    assert cache.load("counts", key) is None
@@ -0,0 +1,47 @@
+import pandas as pd
+from utils.comentions import build_comentions, top_comentions
+
+
+def test_build_comentions():
+    mentions = pd.DataFrame({
+        "message": [0, 0, 0, 1, 1, 2, 3, 3],
+        "symbol_id": [0, 1, 2, 0, 1, 1, 0, 1],
+        "date": pd.to_datetime([
+            "2021-01-27", "2021-01-27", "2021-01-27", "2021-01-27",
+            "2021-01-27", "2021-01-28", "2021-01-29", "2021-01-29",
+        ]),
+    })
+
+    # each pair is counted once per message, and lone mentions make no pairs
+    daily = build_comentions(mentions)
+    assert list(daily.itertuples(index=False, name=None)) == [
+        (pd.Timestamp("2021-01-27"), 0, 1, 2),
+        (pd.Timestamp("2021-01-27"), 0, 2, 1),
+        (pd.Timestamp("2021-01-27"), 1, 2, 1),
+        (pd.Timestamp("2021-01-29"), 0, 1, 1),
+    ]
+
+    # weekly buckets combine days in the same week
+    weekly = build_comentions(mentions, "week")
+    assert list(weekly.occurrences) == [3, 1, 1]
+
+
+def test_top_comentions():
+    symbols = ["AMC", "BB", "GME"]
+    comentions = pd.DataFrame({
+        "date": pd.to_datetime(["2021-01-27", "2021-01-27", "2021-01-28", "2021-01-28"]),
+        "symbol_a": pd.Categorical(["AMC", "AMC", "AMC", "BB"], categories=symbols),
+        "symbol_b": pd.Categorical(["GME", "BB", "GME", "GME"], categories=symbols),
+        "occurrences": [2, 4, 3, 1],
+    })
+
+    # totals are summed across dates and sorted with the most common first
+    top = top_comentions(comentions, ["GME"])
+    assert list(top.itertuples(index=False, name=None)) == [("AMC", "GME", 5), ("BB", "GME", 1)]
+
+    # limit the number of pairs
+    top = top_comentions(comentions, ["AMC", "GME"], n=2)
+    assert list(top.itertuples(index=False, name=None)) == [("AMC", "GME", 5), ("AMC", "BB", 4)]
+
+    # unknown symbols have no pairs
+    assert len(top_comentions(comentions, ["TSLA"])) == 0
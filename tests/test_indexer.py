@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import indexer
+from indexer import create_index, write_hourly_index, write_comention_index
+from utils.load import load_index, load_hourly_index, load_comention_index
+from utils.pyramid import truncate_date, build_pyramid
+from utils.tickers import Ticker
+
+
+# small set of messages mentioning a few stocks
+MESSAGES = """body,timestamp
+buy GME and GME now,2021-01-26 22:10:00
+ GME and AMC to the moon ,2021-01-27 09:50:00
+we like AMC and GME ,2021-01-27 14:00:00
+,2021-01-28 15:00:00
+hold AMC now and BB too,2021-02-02 10:00:00
+"""
+
+
+def make_messages(tmp_path) -> str:
+    path = tmp_path / "reddit_wsb.csv"
+    path.write_text(MESSAGES)
+    return str(path)
+
+
+def make_tickers(*symbols: str):
+    return [Ticker(x, x, "Testing", "Testing") for x in symbols]
+
+
+def test_create_index_cache(tmp_path, monkeypatch):
+    messages_path = make_messages(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    # expected output of runs without the cache
+    create_index(str(tmp_path / "min1.csv"), messages_path, make_tickers("GME", "AMC"), minimum_occurrences=1)
+    create_index(str(tmp_path / "min4.csv"), messages_path, make_tickers("GME", "AMC"), minimum_occurrences=4)
+    create_index(str(tmp_path / "bb.csv"), messages_path, make_tickers("GME", "AMC", "BB"), minimum_occurrences=1)
+    expected = {x: (tmp_path / f"{x}.csv").read_text() for x in ["min1", "min4", "bb"]}
+    assert expected["min1"] != expected["min4"]
+
+    # first run with the cache fills it and matches the run without the cache
+    path = str(tmp_path / "index.csv")
+    create_index(path, messages_path, make_tickers("GME", "AMC"), minimum_occurrences=1, cache_dir=cache_dir)
+    assert (tmp_path / "index.csv").read_text() == expected["min1"]
+
+    # later runs never load and clean the messages again
+    def fail_load_messages(*args, **kwargs):
+        raise AssertionError("messages should be loaded from the cache")
+    monkeypatch.setattr(indexer, "load_messages", fail_load_messages)
+    # record which symbols are counted
+    counted = []
+    count_occurrences = indexer.count_occurrences
+    monkeypatch.setattr(
+        indexer,
+        "count_occurrences",
+        lambda df, symbol: counted.append(symbol) or count_occurrences(df, symbol),
+    )
+
+    # changing the minimum occurrences reuses every count
+    create_index(path, messages_path, make_tickers("GME", "AMC"), minimum_occurrences=4, cache_dir=cache_dir)
+    assert (tmp_path / "index.csv").read_text() == expected["min4"]
+    assert counted == []
+
+    # adding a ticker only counts the new symbol
+    create_index(path, messages_path, make_tickers("GME", "AMC", "BB"), minimum_occurrences=1, cache_dir=cache_dir)
+    assert (tmp_path / "index.csv").read_text() == expected["bb"]
+    assert counted == ["BB"]
+
+    # the new count is cached as well
+    counted.clear()
+    create_index(path, messages_path, make_tickers("GME", "AMC", "BB"), minimum_occurrences=1, cache_dir=cache_dir)
+    assert counted == []
+
+
+def test_create_hourly_index(tmp_path):
+    path = str(tmp_path / "index.csv")
+    hourly_path = str(tmp_path / "hourly.npz")
+    create_index(
+        path,
+        make_messages(tmp_path),
+        make_tickers("GME", "AMC", "BB"),
+        minimum_occurrences=1,
+        hourly_path=hourly_path,
+    )
+
+    # hours are stored after the first hour, and go back in time where the next symbol starts
+    with np.load(hourly_path) as data:
+        assert data["start"] == np.datetime64("2021-01-26T22", "h").astype(np.int64)
+        assert list(data["symbols"]) == ["GME", "AMC", "BB"]
+        assert data["index"].dtype == np.int32
+        assert (data["index"][:, 1] < 0).any()
+
+    # symbols, hours and counts round trip exactly
+    hourly = load_hourly_index(hourly_path)
+    assert list(hourly.itertuples(index=False, name=None)) == [
+        ("GME", pd.Timestamp("2021-01-26 22:00"), 2),
+        ("GME", pd.Timestamp("2021-01-27 09:00"), 1),
+        ("GME", pd.Timestamp("2021-01-27 14:00"), 1),
+        ("AMC", pd.Timestamp("2021-01-27 09:00"), 1),
+        ("AMC", pd.Timestamp("2021-01-27 14:00"), 1),
+        ("AMC", pd.Timestamp("2021-02-02 10:00"), 1),
+        ("BB", pd.Timestamp("2021-02-02 10:00"), 1),
+    ]
+
+    # days rolled up from the hourly index match the daily index
+    daily = build_pyramid(hourly, "hour")["day"]
+    expected = load_index(path)
+    assert list(daily.symbol.astype(str)) == list(expected.symbol)
+    assert list(daily.date) == list(expected.date)
+    assert list(daily.occurrences) == list(expected.occurrences)
+
+
+def test_write_empty_hourly_index(tmp_path):
+    # no symbols reaching the minimum occurrences still writes an index
+    path = str(tmp_path / "hourly.npz")
+    write_hourly_index(path, [], [])
+    df = load_hourly_index(path)
+    assert len(df) == 0
+    assert list(df.columns) == ["symbol", "date", "occurrences"]
+
+
+def test_write_comention_index(tmp_path):
+    path = str(tmp_path / "comentions.npz")
+
+    # no symbols reaching the minimum occurrences still writes an index
+    write_comention_index(path, [], [])
+    df, granularity = load_comention_index(path)
+    assert len(df) == 0
+    assert granularity == "day"
+    assert list(df.columns) == ["date", "symbol_a", "symbol_b", "occurrences"]
+
+    # symbols never mentioned together write an empty index
+    write_comention_index(path, ["GME", "AMC"], [
+        pd.DataFrame({"message": [0], "symbol_id": 0, "date": pd.to_datetime(["2021-01-27"])}),
+        pd.DataFrame({"message": [1], "symbol_id": 1, "date": pd.to_datetime(["2021-01-28"])}),
+    ])
+    assert len(load_comention_index(path)[0]) == 0
+
+    # pairs round trip
+    write_comention_index(path, ["GME", "AMC"], [
+        pd.DataFrame({"message": [0, 1], "symbol_id": 0, "date": pd.to_datetime(["2021-01-27", "2021-01-29"])}),
+        pd.DataFrame({"message": [0, 1], "symbol_id": 1, "date": pd.to_datetime(["2021-01-27", "2021-01-29"])}),
+    ])
+    df, granularity = load_comention_index(path)
+    assert granularity == "day"
+    assert list(df.itertuples(index=False, name=None)) == [
+        (pd.Timestamp("2021-01-27"), "GME", "AMC", 1),
+        (pd.Timestamp("2021-01-29"), "GME", "AMC", 1),
+    ]
+
+
+def test_write_weekly_comention_index(tmp_path):
+    path = str(tmp_path / "comentions.npz")
+    dates = pd.to_datetime(["2021-01-27", "2021-01-29", "2021-02-03"])
+    write_comention_index(path, ["GME", "AMC"], [
+        pd.DataFrame({"message": [0, 1, 2], "symbol_id": 0, "date": dates}),
+        pd.DataFrame({"message": [0, 1, 2], "symbol_id": 1, "date": dates}),
+    ], granularity="week")
+
+    # weekly buckets are dated by their monday and keep their granularity
+    df, granularity = load_comention_index(path)
+    assert granularity == "week"
+    assert list(df.date) == list(pd.to_datetime(["2021-01-25", "2021-02-01"]))
+    assert list(df.occurrences) == [2, 1]
+
+    # a window starting midweek keeps the week it starts in
+    min_date = pd.Timestamp("2021-01-27")
+    assert df[df.date >= truncate_date(min_date, granularity)].occurrences.sum() == 3
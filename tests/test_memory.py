@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from utils.memory import DateOffsets, baseline_bytes, compact_index, memory_report
+
+
+def test_date_offsets():
+    days = DateOffsets(pd.Timestamp("2021-01-01"), "D")
+    hours = DateOffsets(pd.Timestamp("2021-01-01"), "h")
+    dates = pd.Series(pd.to_datetime(["2021-01-01", "2021-01-03", "2021-02-01"]))
+
+    # offsets use the smallest integer type that fits
+    assert list(days.encode(dates)) == [0, 2, 31]
+    assert days.encode(dates).dtype == np.int8
+    assert list(hours.encode(dates)) == [0, 48, 744]
+    assert hours.encode(dates).dtype == np.int16
+
+    # single dates can be compared against encoded columns
+    assert days.encode_one(pd.Timestamp("2021-01-03")) == 2
+    assert hours.encode_one(pd.Timestamp("2020-12-31")) == -24
+
+    # offsets decode back to dates
+    assert list(days.decode(days.encode(dates))) == list(dates)
+    assert hours.decode(48) == pd.Timestamp("2021-01-03")
+
+
+def test_compact_index():
+    symbol_dtype = pd.CategoricalDtype(["AMC", "GME"])
+    offsets = DateOffsets(pd.Timestamp("2021-01-27"), "D")
+    df = pd.DataFrame({
+        "symbol": ["GME", "ASDF", "AMC"],
+        "date": pd.to_datetime(["2021-01-27", "2021-01-28", "2021-01-29"]),
+        "occurrences": [1, 2, 300],
+    })
+
+    # symbols share the categories of the ticker table and unknown symbols are dropped
+    compact = compact_index(df, symbol_dtype, offsets)
+    assert compact.symbol.dtype == symbol_dtype
+    assert list(compact.symbol) == ["GME", "AMC"]
+    assert list(compact.date) == [0, 2]
+    assert list(compact.occurrences) == [1, 300]
+    assert compact.occurrences.dtype == np.uint16
+
+    # baseline measures the original layout regardless of dtypes already used
+    assert baseline_bytes(df) == baseline_bytes(df.astype(dict(symbol="category")))
+    assert baseline_bytes(compact) < baseline_bytes(df)
+
+    # report includes each index
+    assert "index: 2 rows" in memory_report(dict(index=baseline_bytes(df)), dict(index=compact))
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+import pandas as pd
+from utils.pyramid import delta_encode, delta_decode, truncate_date, rollup, build_pyramid
+
+
+def test_delta_encoding():
+    # sorted offsets encode to small deltas
+    offsets = np.array([3, 5, 5, 9, 100])
+    assert list(delta_encode(offsets)) == [3, 2, 0, 4, 91]
+    assert list(delta_decode(delta_encode(offsets))) == list(offsets)
+
+    # offsets that restart for a new symbol still round trip
+    offsets = np.array([10, 20, 2, 4])
+    assert list(delta_decode(delta_encode(offsets))) == list(offsets)
+
+
+def test_rollup():
+    df = pd.DataFrame({
+        "symbol": ["GME", "GME", "GME", "AMC"],
+        "date": pd.to_datetime(["2021-01-27 09:00", "2021-01-27 15:00", "2021-01-28 10:00", "2021-01-27 09:00"]),
+        "occurrences": [1, 2, 4, 8],
+    })
+
+    # hours in the same day are summed
+    daily = rollup(df, "day")
+    assert list(daily.symbol) == ["AMC", "GME", "GME"]
+    assert list(daily.date) == list(pd.to_datetime(["2021-01-27", "2021-01-27", "2021-01-28"]))
+    assert list(daily.occurrences) == [8, 3, 4]
+
+    # weeks start on monday
+    weekly = rollup(df, "week")
+    assert list(weekly.date) == list(pd.to_datetime(["2021-01-25", "2021-01-25"]))
+    assert list(weekly.occurrences) == [8, 7]
+
+    # invalid granularity
+    with pytest.raises(ValueError):
+        rollup(df, "asdf")
+
+
+def test_truncate_date():
+    # dates are moved to the start of their bucket
+    assert truncate_date(pd.Timestamp("2021-01-27 15:30"), "hour") == pd.Timestamp("2021-01-27 15:00")
+    assert truncate_date(pd.Timestamp("2021-01-27 15:30"), "day") == pd.Timestamp("2021-01-27")
+    assert truncate_date(pd.Timestamp("2021-01-27 15:30"), "week") == pd.Timestamp("2021-01-25")
+
+    # a window starting partway through a week keeps that whole week
+    df = pd.DataFrame({
+        "symbol": "GME",
+        "date": pd.date_range("2021-01-21", "2021-01-27", freq="D"),
+        "occurrences": 1,
+    })
+    weekly = rollup(df, "week")
+    min_date = pd.Timestamp("2021-01-21")
+    assert weekly[weekly.date >= truncate_date(min_date, "week")].occurrences.sum() == 7
+    assert df[df.date >= truncate_date(min_date, "day")].occurrences.sum() == 7
+
+
+def test_build_pyramid():
+    df = pd.DataFrame({
+        "symbol": ["GME", "GME"],
+        "date": pd.to_datetime(["2021-01-27 09:00", "2021-02-02 15:00"]),
+        "occurrences": [1, 2],
+    })
+
+    # hourly base includes every level
+    pyramid = build_pyramid(df, granularity="hour")
+    assert list(pyramid) == ["hour", "day", "week"]
+    assert pyramid["hour"] is df
+    assert list(pyramid["week"].occurrences) == [1, 2]
+
+    # daily base cannot show hours
+    assert list(build_pyramid(df)) == ["day", "week"]
+
+    # invalid granularity
+    with pytest.raises(ValueError):
+        build_pyramid(df, granularity="asdf")